@@ -1,113 +1,161 @@
-import jinja2
-
-environment = jinja2.Environment()
-
-finisher_template = environment.from_string("""/*
- * Copyright (c) 2025-2026, Antonio Gabriel Muñoz Conejo <me at tonivade dot es>
- * Distributed under the terms of the MIT License
- */
-package com.github.tonivade.diesel.function;
-
-// generated code
-@FunctionalInterface
-public interface Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}R> {
- 
-  R apply({% for i in range(value) %}T{{ i }} t{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %});
-
-  static <{% for i in range(value) %}T{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}> Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}T0> first() {
-    return (t0{% for i in range(value - 1) %}, _{% endfor %}) -> t0;
-  }
-  
-  static <{% for i in range(value) %}T{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}> Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}T{{ value -1 }}> last() {
-    return ({% for i in range(value - 1) %}_, {% endfor %}t{{ value - 1}}) -> t{{ value - 1}};
-  }
-}
-""")
-
-result_zip_template = environment.from_string("""
-static <F, {% for i in range(value) %}T{{ i }}, {% endfor %}R> Result<F, R> zip(
-  {% for i in range(value) %} Result<F, T{{ i }}> r{{ i }},
-  {% endfor %} Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}R> finisher) {
-  return {% for i in range(value - 1) %}r{{ i }}.flatMap(_{{ i }} -> 
-    {% endfor %}
-    r{{ value - 1 }}.map(_{{ value -1 }} -> finisher.apply({% for i in range(value) %}_{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}))
-    {% for i in range(value - 1) %}){% endfor %};
-}
-""")
-
-program_zip_template = environment.from_string("""
-static <S, E, {% for i in range(value) %}T{{ i }}, {% endfor %}R> Program<S, E, R> zip(
-  {% for i in range(value) %} Program<S, E, T{{ i }}> p{{ i }},
-  {% endfor %} Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}R> finisher) {
-  return {% for i in range(value - 1) %}p{{ i }}.flatMap(_{{ i }} -> 
-    {% endfor %}
-    p{{ value - 1 }}.map(_{{ value - 1 }} -> finisher.apply({% for i in range(value) %}_{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}))
-    {% for i in range(value - 1) %}){% endfor %};
-}
-""")
-
-program_parzip_template = environment.from_string("""
-static <S, E, {% for i in range(value) %}T{{ i }}, {% endfor %}R> Program<S, E, R> parZip(
-  {% for i in range(value) %} Program<S, E, T{{ i }}> p{{ i }},
-  {% endfor %} Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}R> finisher,
-  Executor executor) {
+import argparse
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+@functools.lru_cache(maxsize=16)
+def indices(value: int) -> tuple[int, ...]:
+  return tuple(range(value))
+
+@functools.lru_cache(maxsize=16)
+def types(value: int) -> str:
+  return ", ".join(f"T{i}" for i in indices(value))
+
+INDENT = "  "
+
+def finisher(value: int) -> str:
+  types_csv = types(value)
+  params = ", ".join(f"T{i} t{i}" for i in indices(value))
+  first = ", ".join(["t0", *("_" for _ in indices(value - 1))])
+  last = ", ".join([*("_" for _ in indices(value - 1)), f"t{value - 1}"])
+  return "\n".join([
+    "/*",
+    " * Copyright (c) 2025-2026, Antonio Gabriel Muñoz Conejo <me at tonivade dot es>",
+    " * Distributed under the terms of the MIT License",
+    " */",
+    "package com.github.tonivade.diesel.function;",
+    "",
+    "// generated code",
+    "@FunctionalInterface",
+    f"public interface Finisher{value}<{types_csv}, R> {{",
+    " ",
+    f"{INDENT}R apply({params});",
+    "",
+    f"{INDENT}static <{types_csv}> Finisher{value}<{types_csv}, T0> first() {{",
+    f"{INDENT * 2}return ({first}) -> t0;",
+    f"{INDENT}}}",
+    INDENT,
+    f"{INDENT}static <{types_csv}> Finisher{value}<{types_csv}, T{value - 1}> last() {{",
+    f"{INDENT * 2}return ({last}) -> t{value - 1};",
+    f"{INDENT}}}",
+    "}",
+  ])
+
+def any_zip(kind: str, name: str, prefix: str, value: int) -> str:
+  types_csv = types(value)
+  args = "".join(f" {kind}<{prefix}T{i}> {name}{i},\n  " for i in indices(value))
+  flat_maps = "".join(f"{name}{i}.flatMap(_{i} -> \n    " for i in indices(value - 1))
+  values = ", ".join(f"_{i}" for i in indices(value))
+  return f"""
+static <{prefix}{types_csv}, R> {kind}<{prefix}R> zip(
+  {args} Finisher{value}<{types_csv}, R> finisher) {{
+  return {flat_maps}
+    {name}{value - 1}.map(_{value - 1} -> finisher.apply({values}))
+    {")" * (value - 1)};
+}}"""
+
+def result_zip(value: int) -> str:
+  return any_zip("Result", "r", "F, ", value)
+
+def program_zip(value: int) -> str:
+  return any_zip("Program", "p", "S, E, ", value)
+
+def program_args(value: int) -> str:
+  return "".join(f" Program<S, E, T{i}> p{i},\n  " for i in indices(value))
+
+def program_parzip(value: int) -> str:
+  types_csv = types(value)
+  forks = "".join(f" p{i}.fork(executor), \n      " for i in indices(value))
+  fibers = ", ".join(f"f{i}" for i in indices(value))
+  results = ", ".join([*(f"f{i}.join()" for i in indices(value)), "finisher"])
+  return f"""
+static <S, E, {types_csv}, R> Program<S, E, R> parZip(
+  {program_args(value)} Finisher{value}<{types_csv}, R> finisher,
+  Executor executor) {{
     return zip(
-      {% for i in range(value) %} p{{ i }}.fork(executor), 
-      {% endfor %} ({% for i in range(value) %}f{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}) -> Result.zip({% for i in range(value) %}f{{ i }}.join(), {% endfor %}finisher))
+      {forks} ({fibers}) -> Result.zip({results}))
       .flatMap(Program::from);
-}
-""")
-
-program_parzip_forkjoin_template = environment.from_string("""
-static <S, E, {% for i in range(value) %}T{{ i }}, {% endfor %}R> Program<S, E, R> parZip(
-  {% for i in range(value) %} Program<S, E, T{{ i }}> p{{ i }},
-  {% endfor %} Finisher{{ value }}<{% for i in range(value) %}T{{ i }}, {% endfor %}R> finisher) {
-    return parZip({% for i in range(value) %}p{{ i }}, {% endfor %}finisher, ForkJoinPool.commonPool());
-}
-""")
-
-program_pipe_template = environment.from_string("""
-static <S, E, {% for i in range(value) %}T{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}> Program<S, E, T{{ value - 1}}> pipe(
+}}"""
+
+def program_parzip_forkjoin(value: int) -> str:
+  types_csv = types(value)
+  arguments = ", ".join([*(f"p{i}" for i in indices(value)), "finisher", "ForkJoinPool.commonPool()"])
+  return f"""
+static <S, E, {types_csv}, R> Program<S, E, R> parZip(
+  {program_args(value)} Finisher{value}<{types_csv}, R> finisher) {{
+    return parZip({arguments});
+}}"""
+
+def compose(name: str, method: str, result: Callable[[int], str], value: int) -> str:
+  types_csv = types(value)
+  functions = ",\n  ".join(
+    f" Function<? super T{i}, ? extends {result(i + 1)}> p{i + 1}" for i in indices(value - 1))
+  calls = "".join(f".{method}(p{i + 1})" for i in indices(value - 1))
+  return f"""
+static <S, E, {types_csv}> Program<S, E, T{value - 1}> {name}(
   Program<S, E, T0> p0,
-  {% for i in range(value - 1) %} Function<? super T{{ i }}, ? extends Program<S, E, T{{ i + 1 }}>> p{{ i + 1 }}{% if i < value - 2 %},{% endif %}
-  {% endfor %}) {
-    return p0{% for i in range(value - 1) %}.flatMap(p{{ i + 1}}){% endfor %};
+  {functions}
+  ) {{
+    return p0{calls};
+}}"""
+
+def program_pipe(value: int) -> str:
+  return compose("pipe", "flatMap", lambda i: f"Program<S, E, T{i}>", value)
+
+def program_chain(value: int) -> str:
+  return compose("chain", "map", lambda i: f"T{i}", value)
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+  if path.exists() and path.read_bytes() == data:
+    return False
+  path.write_bytes(data)
+  return True
+
+templates: dict[str, Callable[[int], str]] = {
+  "finisher": finisher,
+  "result-zip": result_zip,
+  "program-zip": program_zip,
+  "program-parzip": program_parzip,
+  "program-parzip-forkjoin": program_parzip_forkjoin,
+  "program-pipe": program_pipe,
+  "program-chain": program_chain,
 }
-""")
 
-program_chain_template = environment.from_string("""
-static <S, E, {% for i in range(value) %}T{{ i }}{% if i < value - 1 %}, {% endif %}{% endfor %}> Program<S, E, T{{ value - 1}}> chain(
-  Program<S, E, T0> p0,
-  {% for i in range(value - 1) %} Function<? super T{{ i }}, ? extends T{{ i + 1 }}> p{{ i + 1 }}{% if i < value - 2 %},{% endif %}
-  {% endfor %}) {
-    return p0{% for i in range(value - 1) %}.map(p{{ i + 1}}){% endfor %};
+snippets: dict[str, str] = {
+  "result-zip": "result zip",
+  "program-zip": "program zip",
+  "program-parzip": "program parzip",
+  "program-parzip-forkjoin": "program parzip fork join",
+  "program-pipe": "program pipe",
+  "program-chain": "program chain",
 }
-""")
-
-for i in range(2, 10):
-  with open(f"src/main/java/com/github/tonivade/diesel/function/Finisher{i}.java", 'w') as file:
-    file.write(finisher_template.render(value=i))
-
-print(">>>> result zip")
-for i in range(2, 10):
-  print(result_zip_template.render(value=i))
-
-print(">>>> program zip")
-for i in range(2, 10):
-  print(program_zip_template.render(value=i))
-
-print(">>>> program parzip")
-for i in range(2, 10):
-  print(program_parzip_template.render(value=i))
-
-print(">>>> program parzip fork join")
-for i in range(2, 10):
-  print(program_parzip_forkjoin_template.render(value=i))
-
-print(">>>> program pipe")
-for i in range(2, 10):
-  print(program_pipe_template.render(value=i))
 
-print(">>>> program chain")
-for i in range(2, 10):
-  print(program_chain_template.render(value=i))
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def render(kind: str, value: int) -> str:
+  return templates[kind](value)
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="generate arity variants of diesel code")
+  parser.add_argument("--kind", action="append", choices=[*templates],
+                      help="what to generate, can be repeated (default: everything)")
+  kinds = parser.parse_args().kind or [*templates]
+
+  if "finisher" in kinds:
+    finishers = {
+      Path(f"src/main/java/com/github/tonivade/diesel/function/Finisher{i}.java"): render("finisher", i).encode("utf-8")
+      for i in range(2, 10)
+    }
+    with ThreadPoolExecutor(max_workers=len(finishers)) as executor:
+      list(executor.map(write_if_changed, finishers.keys(), finishers.values()))
+
+  output: list[str] = []
+  for kind, title in snippets.items():
+    if kind in kinds:
+      output.append(f">>>> {title}\n")
+      output.extend(f"{render(kind, i)}\n" for i in range(2, 10))
+  sys.stdout.buffer.write("".join(output).encode("utf-8"))
+
+if __name__ == "__main__":
+  main()